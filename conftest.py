@@ -0,0 +1,162 @@
+"""
+Shared pytest fixtures for the sc-bed-docker test suite.
+"""
+import re
+import pytest
+from pathlib import Path
+
+
+PROJECT_DIR = Path(__file__).parent
+DOCKER_COMPOSE_FILE = PROJECT_DIR / "docker-compose.yml"
+NGINX_CONFIG_FILE = PROJECT_DIR / "default.conf"
+RUN_CMD_FILE = PROJECT_DIR / "run.cmd"
+
+# Literals the tests look up in the scanned files. A test may only check
+# membership of a literal listed here; add new ones alongside the test.
+NGINX_LITERALS = (
+    "listen 80",
+    "root /var/www/html",
+    "index",
+    "index.php",
+    "index.html",
+    "location /",
+    "try_files",
+    "try_files $uri",
+    "location ~ \\.php$",
+    "fastcgi_split_path_info",
+    "fastcgi_pass php:9000",
+    "fastcgi_index index.php",
+    "include fastcgi_params",
+    "fastcgi_param SCRIPT_FILENAME",
+    "fastcgi_param PATH_INFO",
+)
+
+RUN_CMD_LITERALS = (
+    "@echo off",
+    "REM",
+    "#!/",
+    "set -e",
+    "$@",
+    'for arg in "$@"',
+    "for arg in",
+    "for %%A in (%*)",
+    "%1",
+    "RESET_DB",
+    "reset-db",
+    "--verbose",
+    "docker compose up",
+    "docker compose down",
+    "docker compose down -v",
+    "Starting",
+    "start",
+    "Running",
+    "Destroying",
+    "destroy",
+    "___",
+    "ICE",
+    "CAMPUS",
+)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-slow",
+        action="store_true",
+        default=False,
+        help="run integration and slow tests (require Docker)",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip integration and slow tests unless asked for.
+
+    They run with --run-slow, or when an explicit -m expression selects them.
+    """
+    if config.getoption("--run-slow") or config.getoption("markexpr"):
+        return
+    skip_slow = pytest.mark.skip(reason="needs --run-slow or -m to run")
+    for item in items:
+        if "integration" in item.keywords or "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
+def scan_literals(text, literals):
+    """Return the subset of literals that occur in text, in a single pass.
+
+    The lookahead reports the longest literal starting at each position, so
+    shorter literals that are a prefix of it are recovered from the matches.
+    """
+    ordered = sorted(set(literals), key=len, reverse=True)
+    pattern = re.compile("(?=(%s))" % "|".join(map(re.escape, ordered)))
+    matches = {m.group(1) for m in pattern.finditer(text)}
+    return frozenset(
+        literal for literal in ordered
+        if any(literal in match for match in matches)
+    )
+
+
+@pytest.fixture(scope="session")
+def docker_compose_config():
+    """Load and parse docker-compose.yml configuration."""
+    import yaml
+    
+    with open(DOCKER_COMPOSE_FILE, 'r') as f:
+        return yaml.safe_load(f)
+
+
+@pytest.fixture(scope="session")
+def services(docker_compose_config):
+    """Service definitions from docker-compose.yml."""
+    return docker_compose_config["services"]
+
+
+@pytest.fixture(scope="session")
+def web_service(services):
+    """Nginx web service definition."""
+    return services["web"]
+
+
+@pytest.fixture(scope="session")
+def php_service(services):
+    """PHP-FPM service definition."""
+    return services["php"]
+
+
+@pytest.fixture(scope="session")
+def mariadb_service(services):
+    """MariaDB service definition."""
+    return services["mariadb"]
+
+
+@pytest.fixture(scope="session")
+def service_volumes(services):
+    """Volume mounts of each service, normalised to strings."""
+    return {
+        name: [str(v) for v in service.get("volumes", [])]
+        for name, service in services.items()
+    }
+
+
+@pytest.fixture(scope="session")
+def nginx_config():
+    """Load Nginx configuration file."""
+    with open(NGINX_CONFIG_FILE, 'r') as f:
+        return f.read()
+
+
+@pytest.fixture(scope="session")
+def nginx_tokens(nginx_config):
+    """Set of NGINX_LITERALS present in the Nginx configuration."""
+    return scan_literals(nginx_config, NGINX_LITERALS)
+
+
+@pytest.fixture(scope="session")
+def run_cmd_content():
+    """Load the run.cmd launcher script."""
+    return RUN_CMD_FILE.read_text(encoding="utf-8")
+
+
+@pytest.fixture(scope="session")
+def run_cmd_tokens(run_cmd_content):
+    """Set of RUN_CMD_LITERALS present in run.cmd."""
+    return scan_literals(run_cmd_content, RUN_CMD_LITERALS)